@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD
+from .glowmarkt_api import GlowmarktAPI
 
 PLATFORMS: list[str] = ["sensor"]
 
@@ -16,7 +18,19 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Glowmarkt from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
+    if entry.entry_id not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][entry.entry_id] = GlowmarktAPI(
+            entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD]
+        )
+    api = hass.data[DOMAIN][entry.entry_id]
+
+    async def async_close_session(event: Event) -> None:
+        """Close the API session, as entries are not unloaded on shutdown."""
+        await api.aclose()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_session)
+    )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -26,6 +40,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        api = hass.data[DOMAIN].pop(entry.entry_id)
+        await api.aclose()
 
     return unload_ok
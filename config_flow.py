@@ -11,7 +11,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, APPLICATION_ID
+from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD
 from .glowmarkt_api import GlowmarktAPI
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,14 +27,13 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     """Validate the user input allows us to connect."""
     _LOGGER.debug("Validating user input: %s", data)
 
-    api = GlowmarktAPI(data[CONF_USERNAME], data[CONF_PASSWORD])
-
-    try:
-        _LOGGER.debug("Attempting to authenticate with Glowmarkt API")
-        await api.authenticate()
-    except Exception as err:
-        _LOGGER.error("Authentication failed: %s", str(err))
-        raise InvalidAuth from err
+    async with GlowmarktAPI(data[CONF_USERNAME], data[CONF_PASSWORD]) as api:
+        try:
+            _LOGGER.debug("Attempting to authenticate with Glowmarkt API")
+            await api.authenticate()
+        except Exception as err:
+            _LOGGER.error("Authentication failed: %s", str(err))
+            raise InvalidAuth from err
 
     _LOGGER.info("Successfully authenticated with Glowmarkt API")
     return {"title": f"Glowmarkt ({data[CONF_USERNAME]})"}
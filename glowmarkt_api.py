@@ -1,23 +1,126 @@
 import logging
+import random
+import time
 import aiohttp
 import asyncio
 import async_timeout
-from datetime import datetime, timedelta
+import orjson
+from datetime import datetime, timedelta, timezone
 
 from .const import APPLICATION_ID
 
 _LOGGER = logging.getLogger(__name__)
 
+# Upper bound on how long to wait for catchup requests to land
+CATCHUP_WAIT = 5
+
+# Refresh the token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 60
+
+# Re-request the whole readings window this often; in between, only rows
+# from the newest non-zero reading onwards are requested
+FULL_REFRESH_INTERVAL = 6 * 60 * 60
+
+# Transient failures are retried with backoff, within an overall budget
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BUDGET = 30
+
+# Resource name fragments mapped to (resource_type, data_type); first match wins
+_CLASSIFIER = (
+    ("electricity cost", "electricity", "cost"),
+    ("electricity", "electricity", "consumption"),
+    ("gas cost", "gas", "cost"),
+    ("gas", "gas", "consumption"),
+)
+
+async def _json(response):
+    """Decode a JSON response body with orjson.
+
+    Mirrors aiohttp's response.json(): an empty body decodes to None and a body
+    that is not JSON raises ContentTypeError, so the usual client error
+    handling applies.
+    """
+    body = await response.read()
+    if not body.strip():
+        return None
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as err:
+        raise aiohttp.ContentTypeError(
+            response.request_info,
+            response.history,
+            status=response.status,
+            message=f"Invalid JSON response body: {err}",
+            headers=response.headers,
+        ) from err
+
+def _retry_after(err):
+    """Return the Retry-After delay in seconds from an error response, if any."""
+    try:
+        return float(err.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
 class GlowmarktAPI:
     BASE_URL = "https://api.glowmarkt.com/api/v0-1"
+    READINGS_URL = f"{BASE_URL}/resource/{{}}/readings"
 
     def __init__(self, username, password):
         self.username = username
         self.password = password
         self.token = None
-        self.session = None
+        self._token_expires_at = None
+        self._auth_lock = asyncio.Lock()
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(8)
+        self._resources = None
+        self._resources_stale = False
+        self._last_seen = {}
+        self._readings_cache = {}
+        self._next_full_refresh = 0
         self.initial_load_completed = False  # Add this flag
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def _get_session(self):
+        """Return the shared client session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            # Polls are 20 minutes apart, so idle connections will have been
+            # closed by the next one and it pays for a fresh connect. Within a
+            # poll the catchup, readings and last-time calls all share the pool,
+            # and the DNS cache outlives the keep-alive.
+            connector = aiohttp.TCPConnector(
+                limit=10,
+                limit_per_host=8,
+                ttl_dns_cache=600,
+                keepalive_timeout=75,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=10),
+                trust_env=True,
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close the shared client session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _headers(self):
+        """Return the headers for an authenticated request."""
+        return {
+            "applicationId": APPLICATION_ID,
+            "token": self.token,
+            "Content-Type": "application/json"
+        }
+
     async def authenticate(self):
         """Authenticate with the Glowmarkt API."""
         _LOGGER.debug("Authenticating with Glowmarkt API")
@@ -28,158 +131,334 @@ class GlowmarktAPI:
         }
         data = {"username": self.username, "password": self.password}
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with async_timeout.timeout(10):
-                    async with session.post(url, headers=headers, json=data) as response:
-                        response.raise_for_status()
-                        result = await response.json()
-                        self.token = result["token"]
-                _LOGGER.debug("Authentication successful")
-            except aiohttp.ClientError as err:
-                _LOGGER.error("Error authenticating with Glowmarkt API: %s", err)
-                raise
+        session = await self._get_session()
+        try:
+            async with async_timeout.timeout(10):
+                async with session.post(url, headers=headers, json=data) as response:
+                    response.raise_for_status()
+                    result = await _json(response)
+                    self.token = result["token"]
+                    self._token_expires_at = result.get("exp")
+            _LOGGER.debug("Authentication successful")
+        except aiohttp.ClientError as err:
+            _LOGGER.error("Error authenticating with Glowmarkt API: %s", err)
+            raise
+
+    async def _ensure_token(self, rejected_token=None):
+        """Authenticate if there is no token, it is about to expire, or it was rejected."""
+        async with self._auth_lock:
+            if self.token is not None and self.token == rejected_token:
+                self.token = None
+
+            if self.token is not None and (
+                self._token_expires_at is None
+                or time.time() < self._token_expires_at - TOKEN_REFRESH_MARGIN
+            ):
+                return
 
-    async def send_catchup_request(self):
-        _LOGGER.debug("Fetching hourly readings for the last 24 hours from Glowmarkt API")
-        if not self.token:
             await self.authenticate()
 
-        url = f"{self.BASE_URL}/virtualentity"
-        headers = {
-            "applicationId": APPLICATION_ID,
-            "token": self.token,
-            "Content-Type": "application/json"
-        }
+    async def _request(self, method, url, **kwargs):
+        """Make an authenticated request and return the decoded JSON body.
+
+        A 401 response triggers one re-authentication and retry. Rate limits,
+        server errors, timeouts and dropped connections are retried with
+        backoff; any other client error is raised straight away.
+        """
+        session = await self._get_session()
+        deadline = time.monotonic() + RETRY_BUDGET
+        reauthenticated = False
+        attempt = 0
 
-        async with aiohttp.ClientSession() as session:
+        while True:
+            # Checked on every attempt, as a concurrent request may have
+            # dropped the token while this one was backing off
+            await self._ensure_token()
+            token = self.token
             try:
                 async with async_timeout.timeout(10):
-                    async with session.get(url, headers=headers) as response:
+                    async with session.request(method, url, headers=self._headers(), **kwargs) as response:
                         response.raise_for_status()
-                        virtual_entities = await response.json()
-                        _LOGGER.debug(f"Retrieved virtual entities: {virtual_entities}")
-
-                readings = {"gas": [], "electricity": []}
-
-                for entity in virtual_entities:
-                    _LOGGER.debug(f"Processing entity: {entity}")
-                    if "resources" not in entity:
-                        _LOGGER.warning(f"Unexpected entity structure: {entity}")
-                        continue
-
-                    for resource in entity["resources"]:
-                        _LOGGER.debug(f"Processing resource: {resource}")
-                        resource_id = resource.get("resourceId")
-                        resource_name = resource.get("name", "").lower()
-
-                        readings_url = f"{self.BASE_URL}/resource/{resource_id}/catchup"
-                        _LOGGER.debug(f"Sending Catchup to URL: {readings_url}")
-
-                        try:
-                            async with async_timeout.timeout(10):
-                                async with session.get(readings_url, headers=headers) as readings_response:
-                                    readings_response.raise_for_status()
-                                    await readings_response.json()
-                        except aiohttp.ClientResponseError as err:
-                            _LOGGER.error(f"Error fetching readings for resource {resource_id}: {err}")
-                            continue
+                        return await _json(response)
+            except aiohttp.ClientResponseError as err:
+                if err.status == 401 and not reauthenticated:
+                    _LOGGER.debug("Token rejected, re-authenticating")
+                    reauthenticated = True
+                    await self._ensure_token(rejected_token=token)
+                    continue
+                if err.status not in RETRY_STATUSES:
+                    raise
+                delay = _retry_after(err)
+                error = err
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as err:
+                delay = None
+                error = err
+
+            attempt += 1
+            if delay is None:
+                delay = min(2 ** attempt + random.random(), 30)
+            if attempt > MAX_RETRIES or time.monotonic() + delay > deadline:
+                raise error
+
+            _LOGGER.debug("Request to %s failed (%r), retrying in %.1fs", url, error, delay)
+            await asyncio.sleep(delay)
+
+    def _invalidate_on_unauthorized(self, err):
+        """Drop the token and mark cached resources stale if the API rejected the token.
+
+        The resource list itself is left alone, as a poll in progress may still
+        be iterating it; it is looked up again at the start of the next poll.
+        """
+        if isinstance(err, aiohttp.ClientResponseError) and err.status == 401:
+            _LOGGER.debug("Token rejected, will re-authenticate on the next request")
+            self.token = None
+            self._resources_stale = True
+
+    async def _discover_resources(self):
+        """Return the account's classified resources, looking them up once per token."""
+        if self._resources is not None and not self._resources_stale:
+            return self._resources
+
+        virtual_entities = await self._request("GET", f"{self.BASE_URL}/virtualentity")
+        _LOGGER.debug("Retrieved virtual entities: %s", virtual_entities)
+
+        resources = []
+        for entity in virtual_entities:
+            _LOGGER.debug("Processing entity: %s", entity)
+            if "resources" not in entity:
+                _LOGGER.warning("Unexpected entity structure: %s", entity)
+                continue
+
+            for resource in entity["resources"]:
+                _LOGGER.debug("Processing resource: %s", resource)
+                resource_id = resource.get("resourceId")
+                resource_name = resource.get("name", "").lower()
+
+                if not resource_id:
+                    _LOGGER.warning("Resource missing resourceId: %s", resource)
+                    continue
+
+                for key, resource_type, data_type in _CLASSIFIER:
+                    if key in resource_name:
+                        break
+                else:
+                    _LOGGER.debug("Skipping resource with name: %s", resource_name)
+                    continue
+
+                _LOGGER.debug("Identified resource type: %s, data type: %s", resource_type, data_type)
+                resources.append((resource_id, resource_type, data_type))
+
+        self._resources = resources
+        self._resources_stale = False
+        return resources
+
+    async def _send_resource_catchup(self, resource_id):
+        """Ask the API to catch up on readings for a single resource."""
+        url = f"{self.BASE_URL}/resource/{resource_id}/catchup"
+        _LOGGER.debug("Sending Catchup to URL: %s", url)
+
+        async with self._semaphore:
+            try:
+                await self._request("GET", url)
+            except aiohttp.ClientResponseError as err:
+                _LOGGER.error("Error fetching readings for resource %s: %s", resource_id, err)
+                self._invalidate_on_unauthorized(err)
+
+    async def _fetch_resource(self, resource_id, resource_type, data_type, params):
+        """Fetch the raw readings for a single resource."""
+        url = self.READINGS_URL.format(resource_id)
+        _LOGGER.debug("Fetching readings from URL: %s with params: %s", url, params)
+
+        async with self._semaphore:
+            try:
+                data = await self._request("GET", url, params=params)
+            except aiohttp.ClientResponseError as err:
+                _LOGGER.error("Error fetching readings for resource %s: %s", resource_id, err)
+                self._invalidate_on_unauthorized(err)
+                return resource_id, resource_type, data_type, []
+
+        if not data or not data.get("data"):
+            _LOGGER.warning("No data retrieved for resource %s", resource_id)
+            return resource_id, resource_type, data_type, []
+
+        _LOGGER.debug("Retrieved %s readings for resource %s", len(data["data"]), resource_id)
+
+        latest = next((reading[0] for reading in reversed(data["data"]) if reading[1]), None)
+        if latest is not None:
+            self._last_seen[resource_id] = latest
+
+        return resource_id, resource_type, data_type, data["data"]
+
+    async def _last_reading_time(self, resource_id):
+        """Return the timestamp of the newest reading the API holds for a resource, if known."""
+        url = f"{self.BASE_URL}/resource/{resource_id}/last-time"
+
+        async with self._semaphore:
+            try:
+                data = await self._request("GET", url)
             except aiohttp.ClientError as err:
-                _LOGGER.error(f"Error fetching data from Glowmarkt API: {err}")
-                raise
+                _LOGGER.debug("Could not fetch last reading time for resource %s: %s", resource_id, err)
+                return None
+
+        return (data or {}).get("data", {}).get("lastTs")
+
+    async def _last_reading_times(self, resource_ids):
+        """Return the newest reading time per resource, None where it is unknown."""
+        last_times = await asyncio.gather(
+            *(self._last_reading_time(resource_id) for resource_id in resource_ids)
+        )
+        return dict(zip(resource_ids, last_times))
+
+    async def _wait_for_catchup(self, baseline):
+        """Wait until each resource's last reading time moves past its baseline, or the budget runs out.
+
+        Resources without a baseline can't be tracked; if none has one, this
+        falls back to waiting out the whole budget. Resources are dropped from
+        the checks as soon as they advance.
+        """
+        pending = {resource_id: last_ts for resource_id, last_ts in baseline.items() if last_ts is not None}
+        if not pending:
+            await asyncio.sleep(CATCHUP_WAIT)
+            return
+
+        deadline = time.monotonic() + CATCHUP_WAIT
+        attempt = 0
+
+        try:
+            async with async_timeout.timeout(CATCHUP_WAIT):
+                while pending:
+                    remaining = deadline - time.monotonic()
+                    await asyncio.sleep(min(0.5 * 2 ** attempt + random.uniform(0, 0.5), remaining))
+                    attempt += 1
+
+                    last_times = await self._last_reading_times(list(pending))
+                    pending = {
+                        resource_id: last_ts
+                        for resource_id, last_ts in pending.items()
+                        if last_times[resource_id] is None or last_times[resource_id] <= last_ts
+                    }
+            _LOGGER.debug("Catchup completed after %s checks", attempt)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("Catchup not confirmed within %s seconds, continuing", CATCHUP_WAIT)
+
+    async def send_catchup_request(self):
+        _LOGGER.debug("Fetching hourly readings for the last 24 hours from Glowmarkt API")
+        try:
+            resources = await self._discover_resources()
+            resource_ids = [resource_id for resource_id, _, _ in resources]
+            baseline = await self._last_reading_times(resource_ids)
 
-        # Need to wait 5 seconds for the catchup requests to complete
-        await asyncio.sleep(5)
+            tasks = [self._send_resource_catchup(resource_id) for resource_id in resource_ids]
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    _LOGGER.error("Error sending catchup request: %s", result)
+        except aiohttp.ClientError as err:
+            _LOGGER.error("Error fetching data from Glowmarkt API: %s", err)
+            self._invalidate_on_unauthorized(err)
+            raise
+
+        await self._wait_for_catchup(baseline)
 
     async def get_hourly_readings(self):
         """Get hourly readings for the last 24 hours from the Glowmarkt API."""
         _LOGGER.debug("Fetching hourly readings for the last 24 hours from Glowmarkt API")
-        if not self.token:
-            await self.authenticate()
-
         if self.initial_load_completed:
             await self.send_catchup_request()
 
-        url = f"{self.BASE_URL}/virtualentity"
-        headers = {
-            "applicationId": APPLICATION_ID,
-            "token": self.token,
-            "Content-Type": "application/json"
-        }
+        try:
+            resources = await self._discover_resources()
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with async_timeout.timeout(10):
-                    async with session.get(url, headers=headers) as response:
-                        response.raise_for_status()
-                        virtual_entities = await response.json()
-                        _LOGGER.debug(f"Retrieved virtual entities: {virtual_entities}")
-
-                readings = {"gas": [], "electricity": []}
-
-                for entity in virtual_entities:
-                    _LOGGER.debug(f"Processing entity: {entity}")
-                    if "resources" not in entity:
-                        _LOGGER.warning(f"Unexpected entity structure: {entity}")
-                        continue
-
-                    for resource in entity["resources"]:
-                        _LOGGER.debug(f"Processing resource: {resource}")
-                        resource_id = resource.get("resourceId")
-                        resource_name = resource.get("name", "").lower()
-
-                        if not resource_id:
-                            _LOGGER.warning(f"Resource missing resourceId: {resource}")
-                            continue
-
-                        if "electricity" in resource_name or "gas" in resource_name:
-                            resource_type = "electricity" if "electricity" in resource_name else "gas"
-                            data_type = "cost" if "cost" in resource_name else "consumption"
-                            _LOGGER.debug(f"Identified resource type: {resource_type}, data type: {data_type}")
-                        else:
-                            _LOGGER.debug(f"Skipping resource with name: {resource_name}")
-                            continue
-
-                        readings_url = f"{self.BASE_URL}/resource/{resource_id}/readings"
-                        end_date = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=0)
-                        start_date = end_date - timedelta(hours=48)
-                        params = {
-                            "period": "PT30M",
-                            "function": "sum",
-                            "from": start_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                            "to": end_date.strftime("%Y-%m-%dT%H:%M:%S")
-                        }
-                        _LOGGER.debug(f"Fetching readings from URL: {readings_url} with params: {params}")
-
-                        try:
-                            async with async_timeout.timeout(10):
-                                async with session.get(readings_url, headers=headers, params=params) as readings_response:
-                                    readings_response.raise_for_status()
-                                    data = await readings_response.json()
-                                    _LOGGER.debug(f"Retrieved data for resource {resource_id}: {data}")
-                                    if data.get("data"):
-                                        for reading in data["data"]:
-                                            end_time = datetime.fromtimestamp(reading[0]) + timedelta(hours=0)
-                                            timestamp = end_time.strftime("%Y-%m-%d %H:%M:%S")
-                                            value = reading[1]
-                                            entry = next((item for item in readings[resource_type] if item["datetime"] == timestamp), None)
-                                            if not entry:
-                                                entry = {"datetime": timestamp, "consumption": 0, "cost": 0}
-                                                readings[resource_type].append(entry)
-                                            entry[data_type] += value
-                                        _LOGGER.debug(f"Added readings for {resource_type} {data_type}")
-                                    else:
-                                        _LOGGER.warning(f"No data retrieved for resource {resource_id}")
-                        except aiohttp.ClientResponseError as err:
-                            _LOGGER.error(f"Error fetching readings for resource {resource_id}: {err}")
-                            continue
-
-                _LOGGER.debug(f"Final readings data passed to HA: {readings}")
-                self.initial_load_completed = True
-                return readings
+            buckets = {"gas": {}, "electricity": {}}
+            totals = {
+                resource_type: {"consumption": 0.0, "cost": 0.0}
+                for resource_type in buckets
+            }
+            tasks = []
+            full_refresh = time.monotonic() >= self._next_full_refresh
 
-            except aiohttp.ClientError as err:
-                _LOGGER.error(f"Error fetching data from Glowmarkt API: {err}")
-                raise
+            end_date = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            start_date = end_date - timedelta(hours=48)
+            window_start = start_date.timestamp()
+            base_params = {
+                "period": "PT30M",
+                "function": "sum",
+                "from": start_date.strftime("%Y-%m-%dT%H:%M:%S"),
+                "to": end_date.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+
+            # Between full refreshes only readings after the last one seen are
+            # requested. Only the fetch is a delta: the merge below and the
+            # statistics reconciliation still cover the whole window.
+            for resource_id, resource_type, data_type in resources:
+                params = base_params
+                if not full_refresh and self._last_seen.get(resource_id, 0) > window_start:
+                    from_date = datetime.fromtimestamp(self._last_seen[resource_id], tz=timezone.utc)
+                    params = {**base_params, "from": from_date.strftime("%Y-%m-%dT%H:%M:%S")}
+                tasks.append(self._fetch_resource(resource_id, resource_type, data_type, params))
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            for result in results:
+                if isinstance(result, Exception):
+                    _LOGGER.error("Error fetching readings: %s", result)
+                    continue
+
+                resource_id, _, data_type, rows = result
+                # Rows are kept keyed by their UTC datetime, so each timestamp is
+                # converted once when it arrives rather than on every poll, and a
+                # row repeated by overlapping responses replaces the old value
+                # instead of being counted twice. Cost arrives in pence and is
+                # stored in pounds, so nothing downstream has to convert it.
+                divisor = 100 if data_type == "cost" else 1
+                cached = self._readings_cache.setdefault(resource_id, {})
+                cached.update(
+                    (datetime.fromtimestamp(reading[0], tz=timezone.utc), reading[1] / divisor)
+                    for reading in rows
+                )
+
+            if full_refresh:
+                self._next_full_refresh = time.monotonic() + FULL_REFRESH_INTERVAL
+
+            for resource_id, resource_type, data_type in resources:
+                cached = self._readings_cache.get(resource_id, {})
+                for timestamp in [timestamp for timestamp in cached if timestamp < start_date]:
+                    del cached[timestamp]
+
+                total = 0.0
+                for timestamp, value in cached.items():
+                    entry = buckets[resource_type].setdefault(
+                        timestamp, {"datetime": timestamp, "consumption": 0.0, "cost": 0.0}
+                    )
+                    entry[data_type] += value
+                    total += value
+                totals[resource_type][data_type] += total
+                _LOGGER.debug("Added readings for %s %s", resource_type, data_type)
+
+            readings = {
+                resource_type: sorted(entries.values(), key=lambda x: x["datetime"])
+                for resource_type, entries in buckets.items()
+            }
+            readings["_summary"] = {
+                resource_type: {
+                    "latest": rows[-1] if rows else None,
+                    "total_consumption": totals[resource_type]["consumption"],
+                    "total_cost": totals[resource_type]["cost"],
+                }
+                for resource_type, rows in readings.items()
+            }
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                for resource_type, summary in readings["_summary"].items():
+                    rows = readings[resource_type]
+                    _LOGGER.debug(
+                        "Final %s readings passed to HA: %s rows, first %s, latest %s",
+                        resource_type, len(rows), rows[0] if rows else None, summary["latest"],
+                    )
+            self.initial_load_completed = True
+            return readings
+
+        except aiohttp.ClientError as err:
+            _LOGGER.error("Error fetching data from Glowmarkt API: %s", err)
+            self._invalidate_on_unauthorized(err)
+            raise
 
 _LOGGER.debug("GlowmarktAPI class loaded")
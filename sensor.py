@@ -1,10 +1,9 @@
 """Sensor platform for Glowmarkt integration."""
+import asyncio
 import logging
-import traceback
 import homeassistant.util.dt as dt_util
-from collections import defaultdict
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.statistics import (
     async_import_statistics,
@@ -12,75 +11,47 @@ from homeassistant.components.recorder.statistics import (
     StatisticMetaData,
     get_last_statistics,
 )
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    SensorEntity,
-    SensorStateClass,
-)
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.components.sensor import SensorEntity
 from homeassistant.const import (
     UnitOfEnergy,
     UnitOfVolume,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
-from .const import DOMAIN
-from .glowmarkt_api import GlowmarktAPI
+from .const import DOMAIN, SENSOR_TYPES
 
 _LOGGER = logging.getLogger(__name__)
 
-SENSOR_TYPES = {
-    "electricity_consumption": {
-        "name": "Electricity Consumption",
-        "icon": "mdi:flash",
-        "device_class": "energy",
-        "unit": "kWh",
-        "state_class": "total",
-    },
-    "electricity_cost": {
-        "name": "Electricity Cost",
-        "icon": "mdi:cash",
-        "device_class": "monetary",
-        "unit": "GBP",
-        "state_class": "total",
-    },
-    "gas_consumption": {
-        "name": "Gas Consumption",
-        "icon": "mdi:fire",
-        "device_class": "gas",
-        "unit": "m³",
-        "state_class": "total",
-    },
-    "gas_cost": {
-        "name": "Gas Cost",
-        "icon": "mdi:cash",
-        "device_class": "monetary",
-        "unit": "GBP",
-        "state_class": "total",
-    },
-}
-
 KWH_TO_CUBIC_METERS = 0.0923
 
+# Recorder statistics per statistic_id, keyed by hour start in epoch seconds.
+# Filled from the recorder on first use and kept in step with what we import.
+_LAST_STAT_CACHE: dict[str, dict] = {}
+
+# Hash of the hourly series last brought in sync with the recorder, per statistic_id
+_LAST_PAYLOAD_HASH: dict[str, int] = {}
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Glowmarkt sensor platform."""
-    api = GlowmarktAPI(config_entry.data["username"], config_entry.data["password"])
+    api = hass.data[DOMAIN][config_entry.entry_id]
 
     entities = []
+    inject_lock = asyncio.Lock()
+
+    async def async_inject_historical_data(data):
+        """Import statistics, never running two imports at once."""
+        async with inject_lock:
+            await inject_historical_data(hass, entities, data)
 
     async def async_update_data():
         data = await api.get_hourly_readings()
         if data:
-            for sensor in entities:
-                await inject_historical_data(hass, sensor, dt_util.now())
+            await async_inject_historical_data(data)
         return data
 
     coordinator = DataUpdateCoordinator(
@@ -107,137 +78,172 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     async_add_entities(entities)
 
-    # Schedule the first historical data injection
-    for sensor in entities:
-        await inject_historical_data(hass, sensor, dt_util.now())
+    def forget_statistics():
+        """Drop this entry's cached statistics, which may not survive it being re-added."""
+        for sensor in entities:
+            _LAST_STAT_CACHE.pop(sensor.entity_id, None)
+            _LAST_PAYLOAD_HASH.pop(sensor.entity_id, None)
+
+    config_entry.async_on_unload(forget_statistics)
+
+    # The first refresh ran before any sensors existed, so import its data now;
+    # later refreshes import from the coordinator's update method
+    await async_inject_historical_data(coordinator.data)
 
     return True
 
-    # Schedule the inject_historical_data function to run periodically
-    async def update_historical_data(now):
-        """Update historical data for all sensors."""
-        for sensor in entities:
-            await inject_historical_data(hass, sensor, now)
+def hourly_totals(readings):
+    """Aggregate readings into hourly consumption and cost totals, keyed by epoch hour.
+
+    Readings arrive sorted by time, so the returned dict is in hour order too.
+    """
+    hourly_data = {}
+    for reading in readings:
+        ts = int(reading["datetime"].timestamp())
+        totals = hourly_data.setdefault(ts - ts % 3600, {"consumption": 0.0, "cost": 0.0})
+        totals["consumption"] += reading["consumption"]
+        totals["cost"] += reading["cost"]
+    return hourly_data
+
+async def inject_historical_data(hass: HomeAssistant, entities, data):
+    """Inject historical data for all sensors, aggregating readings to hourly intervals."""
+    if not data:
+        _LOGGER.error("No coordinator data available for historical import")
+        return
 
-#     # Run immediately and then every 30 minutes
-        await update_historical_data(None)
-        async_track_time_interval(
-            hass, update_historical_data, timedelta(minutes=20)
+    # One pass per fuel, shared by its consumption and cost sensors
+    hourly = {
+        resource_type: hourly_totals(data[resource_type])
+        for resource_type in ("gas", "electricity")
+        if resource_type in data
+    }
+
+    missing = [sensor.entity_id for sensor in entities if sensor.entity_id not in _LAST_STAT_CACHE]
+    if missing:
+        # Only hours inside the readings window are reconciled, so the most
+        # recent row per hour of that window is all the recorder needs to return
+        number_of_stats = max((len(sensor_hourly) for sensor_hourly in hourly.values()), default=0) or 1
+        try:
+            existing_stats = await get_instance(hass).async_add_executor_job(
+                last_statistics, hass, missing, number_of_stats
+            )
+        except Exception as e:
+            _LOGGER.error("Error reading existing statistics: %s", e, exc_info=True)
+            return
+        _LOGGER.debug("Loaded existing statistics for %s", missing)
+
+        for statistic_id in missing:
+            _LAST_STAT_CACHE[statistic_id] = {
+                int(stat["start"]): stat
+                for stat in existing_stats.get(statistic_id, [])
+            }
+
+    imports = []
+    for sensor in entities:
+        sensor_hourly = hourly.get(sensor._resource_type, {})
+        payload_hash = hash(
+            tuple((hour, totals[sensor._data_type]) for hour, totals in sensor_hourly.items())
+        )
+        if _LAST_PAYLOAD_HASH.get(sensor.entity_id) == payload_hash:
+            _LOGGER.debug("Readings unchanged for %s, skipping", sensor.name)
+            continue
+
+        try:
+            result = build_statistics(sensor, sensor_hourly, _LAST_STAT_CACHE[sensor.entity_id])
+        except Exception as e:
+            _LOGGER.error("Error processing historical data for %s: %s", sensor.name, e, exc_info=True)
+            _LAST_STAT_CACHE.pop(sensor.entity_id, None)
+            continue
+        if result:
+            imports.append((sensor_hourly, payload_hash, result))
+        else:
+            _LAST_PAYLOAD_HASH[sensor.entity_id] = payload_hash
+
+    # async_import_statistics only queues the import on the recorder thread,
+    # so it is called straight from the event loop. Every sensor is queued in
+    # one burst once all statistics are built, letting the recorder write
+    # them within the same commit interval.
+    for sensor_hourly, payload_hash, (metadata, statistics) in imports:
+        statistic_id = metadata["statistic_id"]
+        try:
+            async_import_statistics(hass, metadata, statistics)
+        except Exception as e:
+            _LOGGER.error("Error importing statistics for %s: %s", statistic_id, e, exc_info=True)
+            _LAST_STAT_CACHE.pop(statistic_id, None)
+            _LAST_PAYLOAD_HASH.pop(statistic_id, None)
+            continue
+        remember_statistics(statistic_id, statistics, min(sensor_hourly))
+        _LAST_PAYLOAD_HASH[statistic_id] = payload_hash
+
+def last_statistics(hass: HomeAssistant, statistic_ids, number_of_stats):
+    """Fetch the most recent statistics for several ids in one executor job."""
+    existing_stats = {}
+    for statistic_id in statistic_ids:
+        existing_stats.update(
+            get_last_statistics(hass, number_of_stats, statistic_id, True, {"state", "sum", "start"})
         )
+    return existing_stats
+
+def remember_statistics(statistic_id, statistics, cutoff):
+    """Record imported statistics in the cache, dropping hours before the readings window."""
+    cached = _LAST_STAT_CACHE[statistic_id]
+    for stat in statistics:
+        start = stat["start"].timestamp()
+        cached[int(start)] = {
+            "start": start,
+            "state": stat["state"],
+            "sum": stat["sum"],
+        }
 
-async def inject_historical_data(hass: HomeAssistant, sensor, timestamp):
-    """Inject historical data for all available readings, aggregating to hourly intervals."""
+    newest = max(cached)
+    for start in [start for start in cached if start < cutoff and start != newest]:
+        del cached[start]
 
-    _LOGGER.debug(f"Starting inject_historical_data for {sensor.name}")
+def build_statistics(sensor, hourly, existing_stats_dict):
+    """Build the statistics to import for one sensor from hourly totals."""
 
-    if not sensor.coordinator or not sensor.coordinator.data:
-        _LOGGER.error(f"No coordinator data available for {sensor.name}")
-        return
+    _LOGGER.debug("Starting build_statistics for %s", sensor.name)
 
-    await sensor.coordinator.async_request_refresh()
-    data = sensor.coordinator.data
-    _LOGGER.debug(f"Raw data: {data}")
+    data_type = sensor._data_type
+    metadata = sensor.statistic_metadata
 
-    resource_type = sensor._sensor_type.split('_')[0]
-    data_type = sensor._sensor_type.split('_')[1]
+    statistics = []
+    last_known_sum = 0
 
-    statistic_id = f"{sensor.entity_id}"
-    _LOGGER.debug(f"Statistic ID: {statistic_id}")
+    if existing_stats_dict:
+        last_stat = max(existing_stats_dict.values(), key=lambda x: x["start"])
+        last_known_sum = round(last_stat["sum"], 3)
 
-    metadata = StatisticMetaData(
-        has_mean=False,
-        has_sum=True,
-        name=sensor._attr_name,
-        source="recorder",
-        statistic_id=statistic_id,
-        unit_of_measurement=sensor._attr_native_unit_of_measurement,
-    )
-    _LOGGER.debug(f"Metadata: {metadata}")
+    _LOGGER.debug("Starting with last known sum: %s", last_known_sum)
 
-    try:
-        existing_stats = await get_instance(hass).async_add_executor_job(
-            get_last_statistics, hass, 1000, statistic_id, True, {"state", "sum", "start"}
-        )
-        _LOGGER.debug(f"Existing stats: {existing_stats}")
+    for hour, totals in hourly.items():
+        value = round(totals[data_type], 3)
 
-        existing_stats_dict = {
-            dt_util.as_utc(datetime.fromtimestamp(stat["start"])): stat
-            for stat in existing_stats.get(statistic_id, [])
-        }
-        _LOGGER.debug(f"Existing stats dict: {existing_stats_dict}")
-
-        sorted_readings = sorted(data[resource_type], key=lambda x: x["datetime"])
-        _LOGGER.debug(f"Sorted readings: {sorted_readings}")
-
-        hourly_data = defaultdict(float)
-        for reading in sorted_readings:
-            timestamp = dt_util.as_utc(datetime.strptime(reading["datetime"], "%Y-%m-%d %H:%M:%S"))
-            hourly_timestamp = timestamp.replace(minute=0, second=0, microsecond=0)
-            value = reading.get(data_type)
-
-            if value is not None:
-                if data_type == "cost":
-                    value = value / 100  # Convert pence to pounds
-                hourly_data[hourly_timestamp] += value
-        _LOGGER.debug(f"Hourly data: {dict(hourly_data)}")
-
-        statistics = []
-        last_known_sum = 0
-
-        if existing_stats_dict:
-            last_stat = max(existing_stats_dict.values(), key=lambda x: x["start"])
-            last_known_sum = round(last_stat["sum"], 3)
-
-        _LOGGER.debug(f"Starting with last known sum: {last_known_sum}")
-
-        for timestamp, value in sorted(hourly_data.items()):
-            value = round(value, 3)
-            _LOGGER.debug(f"Processing timestamp: {timestamp}, value: {value}")
-
-            if timestamp in existing_stats_dict:
-                existing_value = existing_stats_dict[timestamp]["state"]
-                existing_sum = existing_stats_dict[timestamp]["sum"]
-                _LOGGER.debug(f"Existing data found - value: {existing_value}, sum: {existing_sum}")
-
-                if abs(existing_value - value) > 0.001:
-                    _LOGGER.debug(f"Value changed: {existing_value} -> {value}")
-                    sum_diff = value - existing_value
-                    new_sum = round(last_known_sum + sum_diff, 3)
-                else:
-                    _LOGGER.debug("Value unchanged, keeping existing sum")
-                    new_sum = existing_sum
-            else:
-                _LOGGER.debug("New timestamp, adding to last known sum")
-                new_sum = round(last_known_sum + value, 3)
-
-            if (value > 0):
-                statistics.append(
-                    StatisticData(
-                        start=timestamp,
-                        state=value,
-                        sum=new_sum,
-                    )
-                )
-                _LOGGER.debug(f"Added/Updated statistic: Timestamp: {timestamp}, Value: {value}, New Sum: {new_sum}")
-            else:
-                _LOGGER.debug(f"Ignored 0 value statistic: Timestamp: {timestamp}, Value: {value}")
-
-            last_known_sum = new_sum
+        existing = existing_stats_dict.get(hour)
+        if existing is not None and abs(existing["state"] - value) <= 0.001:
+            # Already imported with this value, nothing to write
+            last_known_sum = existing["sum"]
+            continue
 
-        _LOGGER.debug(f"Final statistics to be imported: {statistics}")
+        if existing is None:
+            new_sum = round(last_known_sum + value, 3)
+        else:
+            new_sum = round(last_known_sum + (value - existing["state"]), 3)
 
-        if statistics:
-            await hass.async_add_executor_job(
-                async_import_statistics, hass, metadata, statistics
+        if value > 0:
+            statistics.append(
+                StatisticData(start=dt_util.utc_from_timestamp(hour), state=value, sum=new_sum)
             )
-            _LOGGER.debug(f"Successfully added/updated {len(statistics)} statistic entries for {sensor.name}")
-        else:
-            _LOGGER.debug(f"No new statistics to add for {sensor.name}")
 
-    except Exception as e:
-        _LOGGER.error(f"Error processing historical data for {sensor.name}: {str(e)}", exc_info=True)
+        last_known_sum = new_sum
 
-    _LOGGER.info(f"Completed processing data for {sensor.name}")
+    if not statistics:
+        _LOGGER.debug("No new statistics to add for %s", sensor.name)
+        return None
+
+    _LOGGER.info("Prepared %s statistic entries for %s", len(statistics), sensor.name)
+    _LOGGER.debug("First %s, last %s", statistics[0], statistics[-1])
+    return metadata, statistics
 
 class GlowmarktSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Glowmarkt sensor."""
@@ -246,65 +252,81 @@ class GlowmarktSensor(CoordinatorEntity, SensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor_type = sensor_type
+        self._resource_type, self._data_type = sensor_type.split('_', 1)
         self._attr_device_class = sensor_info["device_class"]
         self._attr_icon = sensor_info["icon"]
         self._attr_state_class = sensor_info["state_class"]
         self._attr_name = f"Glowmarkt {sensor_info['name']}"
         self._attr_unique_id = f"glowmarkt_{sensor_type}"
 
-        if "_cost" in self._sensor_type:
+        if self._data_type == "cost":
             self._attr_native_unit_of_measurement = "GBP"
         else:
             self._attr_native_unit_of_measurement = sensor_info["unit"]
 
+        self._statistic_metadata = None
+
+    @property
+    def statistic_metadata(self):
+        """Return the recorder metadata for this sensor's statistics.
+
+        Built on first use, as entity_id is only assigned once the entity is added.
+        """
+        if self._statistic_metadata is None or self._statistic_metadata["statistic_id"] != self.entity_id:
+            self._statistic_metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=self._attr_name,
+                source="recorder",
+                statistic_id=self.entity_id,
+                unit_of_measurement=self._attr_native_unit_of_measurement,
+            )
+        return self._statistic_metadata
+
     async def async_update(self):
         """Update the sensor."""
         await self.coordinator.async_request_refresh()
 
     @property
-    def native_value(self):
-        """Return the state of the sensor."""
+    def _summary(self):
+        """Return the per-refresh summary for this sensor's fuel, if any."""
         if self.coordinator.data is None:
             return None
+        return self.coordinator.data.get("_summary", {}).get(self._resource_type)
 
-        resource_type = self._sensor_type.split('_')[0]
-        data_type = self._sensor_type.split('_')[1]
-
-        if resource_type not in self.coordinator.data or not self.coordinator.data[resource_type]:
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        summary = self._summary
+        if not summary or summary["latest"] is None:
             return None
 
-        latest_reading = max(self.coordinator.data[resource_type], key=lambda x: x["datetime"])
-        value = latest_reading.get(data_type)
+        value = summary["latest"].get(self._data_type)
 
         if value is None:
             return None
 
-        if data_type == "cost":
-            return round(value / 100, 2)  # Convert pence to pounds
+        if self._data_type == "cost":
+            return round(value, 2)
         else:
             return round(value, 3)
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the sensor."""
-        if self.coordinator.data is None:
-            return {}
-
         attributes = {}
-        total_consumption = 0
-        total_cost = 0
-        resource_type = self._sensor_type.split('_')[0]
 
-        for reading in self.coordinator.data[resource_type]:
-            if "consumption" in self._sensor_type:
-                total_consumption += reading.get("consumption", 0)
-            if "cost" in self._sensor_type:
-                total_cost += reading.get("cost", 0)
+        summary = self._summary
+        if not summary:
+            return attributes
+
+        total_consumption = summary["total_consumption"]
+        total_cost = summary["total_cost"]
 
         if total_consumption > 0 and total_cost > 0:
-            cost_per_unit = (total_cost / 100) / total_consumption  # pence to pounds
+            cost_per_unit = total_cost / total_consumption
             attributes["cost_per_unit"] = round(cost_per_unit, 4)
 
-            if 'gas' in self._sensor_type:
+            if self._resource_type == "gas":
                 attributes["cost_per_unit_unit"] = f"GBP/{UnitOfVolume.CUBIC_METERS}"
             else:
                 attributes["cost_per_unit_unit"] = f"GBP/{UnitOfEnergy.KILO_WATT_HOUR}"